@@ -1,6 +1,7 @@
 import numpy as np
 import gurobipy as gp
 import warnings
+from collections.abc import Mapping
 from itertools import product
 from types import GeneratorType
 
@@ -20,11 +21,13 @@ class Model:
 
 # main model
 class GrbModel:
-    def __init__(self, name="", grb_display=0, **args):
+    def __init__(self, name="", grb_display=0, names=True, **args):
         self.env = gp.Env(empty=True)
         self.env.setParam('OutputFlag', grb_display)
         self.env.start()
         self.name = name
+        # pass element names to the solver or not
+        self.names = names
         self.md = gp.Model(name, env=self.env)
         self.typemap = {
             "C": gp.GRB.CONTINUOUS, 
@@ -56,36 +59,84 @@ class GrbModel:
             shape = (int(shape),)
         elif type(shape) is not tuple:
             shape = tuple(shape)
-        if name is None or name == "":
-            params = {'lb':lb, 'ub':ub, 'vtype':vtype}
-            res = self.md.addMVar(shape, **params)
-        else:
-            params = {'lb':lb, 'ub':ub, 'vtype':vtype, 'name':name}
-            res = self.md.addMVar(shape, **params)
+        params = {'lb':lb, 'ub':ub, 'vtype':vtype}
+        if name is not None and name != "" and self.names:
+            params['name'] = name
+        res = self.md.addMVar(shape, **params)
+        if name is not None and name != "":
             # only save the named variables
             self.vars[name] = res
         return res
 
-    def idxNameDict(self, items, itemType='var'):
+    # name of the element idx in block, generated on demand
+    def itemName(self, key, idx=()):
+        idx = [int(i) for i in np.atleast_1d(idx)]
+        if len(idx) == 0:
+            return key
+        return key + str(idx).replace(' ', '')
+
+    # reverse lookup from solver column/row indices or names of the named
+    # matrix blocks, return {block: (positions in keys, multi-index)}
+    def locate(self, keys, itemType='var'):
+        items = self.vars if itemType == 'var' else self.cons
+        keys = np.atleast_1d(keys)
+        if keys.dtype.kind in 'iu':
+            return self._locateIdx(items, keys)
         res = {}
-        if isinstance(items, gp.tupledict):
-            for key in items:
-                if itemType == 'var':
-                    res[key] = items[key].varName
-                else:
-                    if isinstance(items[key], gp.QConstr):
-                        res[key] = items[key].QCName
-                    else:
-                        res[key] = items[key].constrName
-        else:
+        for pos, key in enumerate(keys.tolist()):
+            block, _, idx = key.partition('[')
+            if block not in items or isinstance(items[block], gp.tupledict):
+                raise KeyError(key)
+            idx = tuple(int(i) for i in idx.rstrip(']').split(',')) if idx else ()
+            res.setdefault(block, ([], []))
+            res[block][0].append(pos)
+            res[block][1].append(idx)
+        for block, (pos, idx) in res.items():
+            idx = np.array(idx, dtype=int).reshape(len(pos), -1)
+            res[block] = (np.array(pos), tuple(idx.T))
+        return res
+
+    # only blocks of variables or linear constraints share the index space
+    # of the keys, tupledicts and quadratic constraints are skipped
+    def _locateIdx(self, items, keys):
+        self.md.update()
+        blocks, starts = [], []
+        for key, item in items.items():
+            if isinstance(item, (gp.Var, gp.Constr)):
+                blocks.append(key)
+                starts.append(item.index)
+            elif isinstance(item, (gp.MVar, gp.MConstr)) and item.size > 0:
+                blocks.append(key)
+                first = item if item.ndim == 0 else item[(0,) * item.ndim]
+                starts.append(first.item().index)
+        starts = np.array(starts, dtype=int)
+        order = np.argsort(starts)
+        starts = starts[order]
+        bidx = np.searchsorted(starts, keys, side='right') - 1
+        res = {}
+        for b in np.unique(bidx):
+            pos = np.nonzero(bidx == b)[0]
+            key = blocks[order[b]] if b >= 0 else None
+            shape = () if key is None or isinstance(items[key], (gp.Var, gp.Constr)) else items[key].shape
+            if key is None or np.any(keys[pos] - starts[b] >= int(np.prod(shape, dtype=int))):
+                raise IndexError('Index out of range.')
+            res[key] = (pos, () if len(shape) == 0 else np.unravel_index(keys[pos] - starts[b], shape))
+        return res
+
+    def idxNameDict(self, items, itemType='var', key=None):
+        # names of matrix blocks follow the gurobi format and are generated
+        # on demand, also when names are not passed to the solver
+        if not isinstance(items, gp.tupledict):
+            return _NameMap(self, key, getattr(items, 'shape', ()))
+        res = {}
+        for idx in items:
             if itemType == 'var':
-                items = items.varName
+                res[idx] = items[idx].varName
             else:
-                items = items.constrName
-            it = np.nditer(items, flags=['multi_index', 'refs_ok'])
-            for x in it:
-                key = it.multi_index
-                res[it.multi_index] = str(x)
+                if isinstance(items[idx], gp.QConstr):
+                    res[idx] = items[idx].QCName
+                else:
+                    res[idx] = items[idx].constrName
         return res
 
     # any array of expressions with compatible rhs array
@@ -97,10 +148,9 @@ class GrbModel:
             exprs = exprs >= rhs
         elif sense == '<=':
             exprs = exprs <= rhs
-        if name is None or name == "":
-            params = {}
-        else:
-            params = {'name': name}
+        params = {}
+        if name is not None and name != "" and self.names:
+            params['name'] = name
         # add constraints
         if isinstance(exprs, GeneratorType):
             res = self.md.addConstrs(exprs, **params)
@@ -127,11 +177,11 @@ class GrbModel:
         if varsidx_update == 'all':
             varsidx_update = self.vars.keys()
         for name in varsidx_update:
-            self.varsidx[name] = self.idxNameDict(self.vars[name], itemType='var')
+            self.varsidx[name] = self.idxNameDict(self.vars[name], itemType='var', key=name)
         if considx_update == 'all':
             considx_update = self.cons.keys()
         for name in considx_update:
-            self.considx[name] = self.idxNameDict(self.cons[name], itemType='con')
+            self.considx[name] = self.idxNameDict(self.cons[name], itemType='con', key=name)
 
     # set gurobi parameters
     def setParams(self, params):
@@ -165,3 +215,23 @@ class GrbModel:
                 return self.statusCode[status]
             else:
                 return 'STATUS CODE: ' + str(status)
+
+
+# read-only {multi-index: name} of a matrix block, names built on access
+class _NameMap(Mapping):
+    def __init__(self, md, key, shape):
+        self.md = md
+        self.key = key
+        self.shape = shape
+
+    def __getitem__(self, idx):
+        idx = tuple(int(i) for i in np.atleast_1d(idx)) if idx != () else ()
+        if len(idx) != len(self.shape) or any(not 0 <= i < n for i, n in zip(idx, self.shape)):
+            raise KeyError(idx)
+        return self.md.itemName(self.key, idx)
+
+    def __iter__(self):
+        return np.ndindex(*self.shape)
+
+    def __len__(self):
+        return int(np.prod(self.shape, dtype=int))
@@ -1,9 +1,19 @@
 import numpy as np
+import scipy.sparse as sp
 import gurobipy as gp
 import warnings
 from stopwatch.stopwatch import Stopwatch
 import sys
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import docplex.mp.model as cp
+from docplex.mp.solution import SolveSolution
+from docplex.mp.dvar import Var as CpxVar
+from docplex.mp.linear import LinearOperand
 from docplex.util.status import JobSolveStatus as jst
 
 #### Core function to make np arrays of vars and constraints
@@ -30,29 +40,377 @@ def mkarr(size, func, params={}):
     return np.array(mkarr_h(size, func, params=params))
 
 
+#### Contractions of expression arrays
+# numpy array of solver objects, np.einsum and np.tensordot on it
+# dispatch to the tensoropt versions
+# arrays derived from model variables by arithmetic, indexing, transposes
+# and einsum carry a structural key (_key) and are cached per model (_md)
+# if the model has a cache_size; the cache hands out copies, and writing to
+# an array drops its key (writes through plain ndarray views can not be seen)
+class Tensor(np.ndarray):
+    def __array_finalize__(self, obj):
+        self._md = getattr(obj, '_md', None)
+        self._key = None
+
+    # full reductions give the expression itself, as for plain object arrays
+    def __array_wrap__(self, arr, *args, **kwargs):
+        if arr.ndim == 0:
+            return arr[()]
+        return super().__array_wrap__(arr, *args, **kwargs)
+
+    def __array_function__(self, func, types, args, kwargs):
+        if func in _HANDLED:
+            return _HANDLED[func](*args, **kwargs)
+        if func in _WRITES and len(args) > 0:
+            _drop_key(args[0])
+        return super().__array_function__(func, types, args, kwargs)
+
+    def fill(self, value):
+        _drop_key(self)
+        super().fill(value)
+
+    def put(self, *args, **kwargs):
+        _drop_key(self)
+        super().put(*args, **kwargs)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        md = next((x._md for x in inputs if isinstance(x, Tensor) and x._md is not None), None)
+        key = None
+        if ufunc in _CACHED_UFUNCS and method in ('__call__', 'reduce') and 'out' not in kwargs:
+            md, key = _memo_key((ufunc.__name__, method), inputs, kwargs)
+            if key is not None:
+                res = md._cache_get(key)
+                if res is not None:
+                    return res
+        inputs = [np.asarray(x) if isinstance(x, Tensor) else x for x in inputs]
+        if 'out' in kwargs:
+            for x in kwargs['out']:
+                _drop_key(x)
+            kwargs['out'] = tuple(np.asarray(x) if isinstance(x, Tensor) else x for x in kwargs['out'])
+        res = getattr(ufunc, method)(*inputs, **kwargs)
+        if isinstance(res, np.ndarray) and res.dtype == object:
+            return _wrap(res, md, key)
+        return res
+
+    def __getitem__(self, idx):
+        res = super().__getitem__(idx)
+        if isinstance(res, Tensor) and self._key is not None:
+            idx_key = _index_key(idx)
+            if idx_key is not None:
+                res._key = ('getitem', self._key, idx_key)
+        return res
+
+    def __setitem__(self, idx, val):
+        _drop_key(self)
+        super().__setitem__(idx, val)
+
+    def transpose(self, *axes):
+        res = super().transpose(*axes)
+        if self._key is not None and _hashable(axes):
+            res._key = ('transpose', self._key, axes)
+        return res
+
+    @property
+    def T(self):
+        return self.transpose()
+
+
+_CACHED_UFUNCS = {np.add, np.subtract, np.multiply, np.matmul, np.negative, np.positive, np.true_divide}
+
+
+# object array as a Tensor of md, cached under key if given
+def _wrap(res, md, key):
+    res = res.view(Tensor)
+    res._md = md
+    if key is not None:
+        res._key = key
+        md._cache_put(key, _fresh(res))
+    return res
+
+
+# copy of a cached array keeping its key, so callers can modify it
+def _fresh(res):
+    out = res.copy()
+    out._key = res._key
+    return out
+
+
+# an array (and the arrays it is a view of) no longer matches its key
+def _drop_key(arr):
+    while isinstance(arr, Tensor):
+        arr._key = None
+        arr = arr.base
+
+
+# model and structural key of an operation on inputs, key is None if the
+# operation can not be cached
+def _memo_key(op, inputs, kwargs):
+    md = next((x._md for x in inputs if isinstance(x, Tensor) and x._md is not None), None)
+    if md is None or md.cache_size == 0:
+        return md, None
+    keys = []
+    for x in inputs:
+        keys.append(_operand_key(x))
+        if keys[-1] is None:
+            return md, None
+    kw = tuple(sorted(kwargs.items()))
+    if not _hashable(kw):
+        return md, None
+    return md, (op, tuple(keys), kw)
+
+
+def _hashable(obj):
+    try:
+        hash(obj)
+    except TypeError:
+        return False
+    return True
+
+
+def _operand_key(x):
+    if isinstance(x, Tensor):
+        return x._key
+    if isinstance(x, (bool, int, float, np.number)):
+        return ('scalar', type(x).__name__, x)
+    if isinstance(x, (np.ndarray, list)):
+        return _data_key(np.asarray(x))
+    return None
+
+
+# content hash of a numeric array
+def _data_key(arr):
+    if arr.dtype == object:
+        return None
+    digest = hashlib.blake2b(np.ascontiguousarray(arr).data, digest_size=16).hexdigest()
+    return ('data', arr.shape, arr.dtype.str, digest)
+
+
+def _index_key(idx):
+    if isinstance(idx, tuple):
+        keys = tuple(_index_key(i) for i in idx)
+        return None if None in keys else keys
+    if isinstance(idx, slice):
+        return ('slice', idx.start, idx.stop, idx.step)
+    if idx is None or idx is Ellipsis or isinstance(idx, (int, np.integer)):
+        return ('idx', str(idx))
+    if isinstance(idx, (np.ndarray, list)):
+        return _data_key(np.asarray(idx))
+    return None
+
+
+# einsum with at most one symbolic (object) operand; the numeric operands
+# are contracted first, in the pairwise order keeping the fewest nonzeros,
+# then the coefficient block against the symbolic operand is built directly
+def einsum(subscripts, *operands, **kwargs):
+    md, key = _memo_key(('einsum', subscripts), operands, {})
+    if key is not None:
+        res = md._cache_get(key)
+        if res is not None:
+            return res
+    operands = [np.asarray(op) for op in operands]
+    sym = [i for i, op in enumerate(operands) if op.dtype == object]
+    if len(sym) == 0:
+        return np.einsum(subscripts, *operands, **kwargs)
+    if len(sym) > 1:
+        raise ValueError('einsum supports only one symbolic operand.')
+    ins, out, dims = _parse_subscripts(subscripts, operands)
+    X, xs = operands[sym[0]], ins[sym[0]]
+    numeric = [(ins[i], op.astype(float)) for i, op in enumerate(operands) if i != sym[0]]
+    ws, W = _contract(numeric, set(out) | set(xs))
+    rows, cols, vals = _coeff_block(ws, W, xs, X.shape, out, dims)
+    res = _build_exprs(X.ravel(), rows, cols, vals, tuple(dims[l] for l in out))
+    if len(out) == 0:
+        return res[()]
+    return _wrap(res, md, key)
+
+
+# tensordot through einsum, axes as in np.tensordot
+def tensordot(a, b, axes=2):
+    a, b = np.asarray(a), np.asarray(b)
+    if a.dtype != object and b.dtype != object:
+        return np.tensordot(a, b, axes=axes)
+    if isinstance(axes, (int, np.integer)):
+        axes = (list(range(a.ndim - axes, a.ndim)), list(range(axes)))
+    ax, bx = [np.atleast_1d(ax) % nd for ax, nd in zip(axes, (a.ndim, b.ndim))]
+    letters = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    sa = list(letters[:a.ndim])
+    sb = list(letters[a.ndim:a.ndim + b.ndim])
+    for i, j in zip(ax, bx):
+        sb[j] = sa[i]
+    out = [l for i, l in enumerate(sa) if i not in ax] + [l for j, l in enumerate(sb) if j not in bx]
+    return einsum(''.join(sa) + ',' + ''.join(sb) + '->' + ''.join(out), a, b)
+
+
+_HANDLED = {np.einsum: einsum, np.tensordot: tensordot}
+# numpy functions writing into their first argument
+_WRITES = {np.copyto, np.put, np.place, np.putmask, np.put_along_axis, np.fill_diagonal}
+
+
+# input subscripts, output subscript and letter sizes
+def _parse_subscripts(subscripts, operands):
+    if not isinstance(subscripts, str) or '.' in subscripts:
+        raise ValueError('einsum supports explicit subscripts without ellipsis only.')
+    subscripts = subscripts.replace(' ', '')
+    if '->' in subscripts:
+        ins, out = subscripts.split('->')
+        ins = ins.split(',')
+    else:
+        ins = subscripts.split(',')
+        letters = ''.join(ins)
+        out = ''.join(sorted(l for l in set(letters) if letters.count(l) == 1))
+    if len(ins) != len(operands):
+        raise ValueError('Number of subscripts does not match the number of operands.')
+    dims = {}
+    for sub, op in zip(ins, operands):
+        if len(sub) != op.ndim:
+            raise ValueError('Subscripts "%s" do not match an operand of shape %s.' % (sub, op.shape))
+        for l, n in zip(sub, op.shape):
+            if dims.setdefault(l, n) != n:
+                raise ValueError('Inconsistent size for subscript "%s".' % l)
+    return ins, out, dims
+
+
+# contract numeric operands down to the letters in keep, return (subscript, array)
+def _contract(numeric, keep):
+    # sum out private letters and take diagonals first
+    ops = []
+    for i, (sub, arr) in enumerate(numeric):
+        others = set(keep).union(*[set(s) for j, (s, _) in enumerate(numeric) if j != i])
+        res = ''.join(l for l in dict.fromkeys(sub) if l in others)
+        ops.append((res, np.einsum(sub + '->' + res, arr)))
+    while len(ops) > 1:
+        best = None
+        for i in range(len(ops)):
+            for j in range(i + 1, len(ops)):
+                others = set(keep).union(*[set(s) for k, (s, _) in enumerate(ops) if k not in (i, j)])
+                res = ''.join(l for l in dict.fromkeys(ops[i][0] + ops[j][0]) if l in others)
+                arr = np.einsum(ops[i][0] + ',' + ops[j][0] + '->' + res, ops[i][1], ops[j][1])
+                if best is None or np.count_nonzero(arr) < best[0]:
+                    best = (np.count_nonzero(arr), i, j, res, arr)
+        _, i, j, res, arr = best
+        ops = [op for k, op in enumerate(ops) if k not in (i, j)] + [(res, arr)]
+    if len(ops) == 0:
+        return '', np.ones(())
+    return ops[0]
+
+
+# coefficients (rows into out, cols into X, vals) of the contraction W[ws] X[xs] -> out
+def _coeff_block(ws, W, xs, xshape, out, dims):
+    if W.ndim == 0:
+        nzw, wvals = (), W.reshape(1)[W.reshape(1) != 0]
+    else:
+        nzw = np.nonzero(W)
+        wvals = W[nzw]
+    xo = [l for l in dict.fromkeys(xs) if l not in ws]
+    gshape = tuple(dims[l] for l in xo)
+    grid = np.indices(gshape).reshape(len(xo), int(np.prod(gshape, dtype=int)))
+    idx = {}
+    for k, l in enumerate(ws):
+        idx[l] = np.repeat(nzw[k], grid.shape[1])
+    for k, l in enumerate(xo):
+        idx[l] = np.tile(grid[k], len(wvals))
+    vals = np.repeat(wvals, grid.shape[1])
+    if len(out) > 0:
+        rows = np.ravel_multi_index(tuple(idx[l] for l in out), tuple(dims[l] for l in out))
+    else:
+        rows = np.zeros(len(vals), dtype=int)
+    if len(xs) > 0:
+        cols = np.ravel_multi_index(tuple(idx[l] for l in xs), xshape)
+    else:
+        cols = np.zeros(len(vals), dtype=int)
+    return rows, cols, vals
+
+
+# object array of shape with linear expressions sum(vals * items[cols]) per row
+def _build_exprs(items, rows, cols, vals, shape):
+    res = np.zeros(int(np.prod(shape, dtype=int)), dtype=object)
+    order = np.argsort(rows, kind='stable')
+    rows, cols, vals = rows[order], cols[order], vals[order]
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) > 0 else np.zeros(0, dtype=int)
+    ends = np.r_[starts[1:], len(rows)]
+    linexpr = _linexpr_func(items)
+    for r, b, e in zip(rows[starts].tolist(), starts.tolist(), ends.tolist()):
+        res[r] = linexpr(vals[b:e].tolist(), items[cols[b:e]].tolist())
+    return res.reshape(shape)
+
+
+# fastest linear expression constructor for the item types
+def _linexpr_func(items):
+    if all(isinstance(item, gp.Var) for item in items):
+        return gp.LinExpr
+    if len(items) > 0 and all(isinstance(item, CpxVar) for item in items):
+        model = items[0].model
+        return lambda coefs, mvars: model.scal_prod(mvars, coefs)
+    return lambda coefs, exprs: sum(c * e for c, e in zip(coefs, exprs))
+
+
 #### generic model distributor
 class Model:
     def __init__(self):
         pass
 
-    def __new__(cls, solver='gurobi', **args):
+    # profile: json file of tuned parameters {solver: {param: value}}
+    def __new__(cls, solver='gurobi', profile=None, **args):
         solvers = {
             'gurobi': GrbModel,
             'cplex': CpxModel
         }
-        return solvers[solver](**args)
+        md = solvers[solver](**args)
+        if profile is not None:
+            with open(profile) as f:
+                md.setParams(json.load(f).get(solver, {}))
+        return md
+
+    # build a model from standard form arrays, see BaseModel.to_standard_form
+    @staticmethod
+    def from_standard_form(c, A, lb_row, ub_row, lb_col, ub_col, integrality=None, obj_sense='min', obj_const=0, solver='gurobi', **args):
+        md = Model(solver=solver, **args)
+        md.load(c, A, lb_row, ub_row, lb_col, ub_col, integrality=integrality, sense=obj_sense, obj_const=obj_const)
+        return md
 
 
 #### the base model as interface and common functionalities
 class BaseModel:
-    def __init__(self, name=""):
+    def __init__(self, name="", names=True, cache_size=0, share_after=None, standard_form=False):
         self.name = name
+        # pass element names to the solver or not
+        self.names = names
+        # expression cache, at most cache_size entries (0 disables it)
+        self.cache_size = cache_size
+        # replace an expression by a shared auxiliary var after that many hits
+        self.share_after = share_after
+        self._cache = OrderedDict()
+        self._hits = {}
+        self._tensoridx = 0
         self.md = self._gen_model()
         self.typemap, self.sensemap, self.statusmap, self.paramsmap = self._gen_maps()
         self.varidx = 0
         self.vars = {}
         self.conidx = 0
         self.cons = {}
+        # general (indicator, pwl, logical) constraints
+        self.gconidx = 0
+        self.gcons = {}
+        # record the standard form while building (to_standard_form then
+        # returns views), otherwise it is read back from the solver on demand
+        self.standard_form = standard_form
+        # standard form storage, grown in place: column bounds, integrality,
+        # objective and the CSR rows of lb_row <= A x <= ub_row
+        self._ncols = 0
+        self._lb_col = np.zeros(0)
+        self._ub_col = np.zeros(0)
+        self._int_col = np.zeros(0, dtype=np.int8)
+        self._c = np.zeros(0)
+        self._nrows = 0
+        self._indptr = np.zeros(1, dtype=np.int32)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._data = np.zeros(0)
+        self._lb_row = np.zeros(0)
+        self._ub_row = np.zeros(0)
+        self._sense = 'min'
+        self._obj_const = 0.0
+        # false once a nonlinear expression is added
+        self._linear = True
 
     def varnum(self):
         res = 0
@@ -66,14 +424,117 @@ class BaseModel:
             res += self.cons[key].size
         return res
 
+    # name of the element idx in block, generated on demand
+    def item_name(self, block, idx=()):
+        idx = [int(i) for i in np.atleast_1d(idx)]
+        if len(idx) == 0:
+            return block
+        return block + str(idx).replace(' ', '')
+
+    # reverse lookup from solver column/row indices or names
+    # return {block: (positions in keys, multi-index)}
+    def locate(self, keys, itemType='var'):
+        items = self.vars if itemType == 'var' else self.cons
+        keys = np.atleast_1d(keys)
+        if keys.dtype.kind in 'iu':
+            return self._locate_idx(items, keys)
+        return self._locate_name(items, keys)
+
+    def _locate_idx(self, items, keys):
+        blocks, offs = self._offsets(items)
+        bidx = np.searchsorted(offs, keys, side='right') - 1
+        if np.any(bidx < 0) or np.any(keys >= offs[-1]):
+            raise IndexError('Index out of range.')
+        res = {}
+        for b in np.unique(bidx):
+            pos = np.nonzero(bidx == b)[0]
+            shape = items[blocks[b]].shape
+            if len(shape) == 0:
+                res[blocks[b]] = (pos, ())
+            else:
+                res[blocks[b]] = (pos, np.unravel_index(keys[pos] - offs[b], shape))
+        return res
+
+    def _locate_name(self, items, keys):
+        groups = {}
+        for pos, key in enumerate(keys.tolist()):
+            block, _, idx = key.partition('[')
+            if block not in items:
+                raise KeyError(key)
+            idx = tuple(int(i) for i in idx.rstrip(']').split(',')) if idx else ()
+            groups.setdefault(block, ([], []))
+            groups[block][0].append(pos)
+            groups[block][1].append(idx)
+        res = {}
+        for block, (pos, idx) in groups.items():
+            idx = np.array(idx, dtype=int).reshape(len(pos), -1)
+            res[block] = (np.array(pos), tuple(idx.T))
+        return res
+
+    # block names with their starting offsets, in creation order
+    # the last offset is the total number of items
+    def _offsets(self, items):
+        blocks = list(items)
+        sizes = [items[key].size for key in blocks]
+        return blocks, np.concatenate(([0], np.cumsum(sizes, dtype=int)))
+
     def var(self, size=[], lb=-float('inf'), ub=float('inf'), vtype='C', name=""):
         if name is None or name == "":
             name = "var" + str(self.varidx)
             self.varidx += 1
         # create the array of vars
         params = {'lb':lb, 'ub':ub, 'vtype':vtype, 'name':name}
-        self.vars[name] = mkarr(size, self._var_func, params=params)
-        return self.vars[name]
+        return self._add_var(name, mkarr(size, self._var_func, params=params), lb, ub, vtype)
+
+    # register an array of vars and store its columns
+    def _add_var(self, name, arr, lb, ub, vtype):
+        arr = arr.view(Tensor)
+        arr._md = self
+        arr._key = ('var', self._tensoridx)
+        self._tensoridx += 1
+        self.vars[name] = arr
+        if not self.standard_form:
+            return arr
+        lb = np.broadcast_to(np.asarray(lb, dtype=float), arr.shape).ravel()
+        ub = np.broadcast_to(np.asarray(ub, dtype=float), arr.shape).ravel()
+        vtype = np.broadcast_to(np.asarray(vtype), arr.shape).ravel()
+        n0, n = self._ncols, self._ncols + arr.size
+        self._lb_col = _grow(self._lb_col, n)
+        self._ub_col = _grow(self._ub_col, n)
+        self._int_col = _grow(self._int_col, n)
+        self._c = _grow(self._c, n)
+        self._lb_col[n0:n] = np.where(vtype == 'B', np.maximum(lb, 0), lb)
+        self._ub_col[n0:n] = np.where(vtype == 'B', np.minimum(ub, 1), ub)
+        self._int_col[n0:n] = vtype != 'C'
+        self._c[n0:n] = 0
+        self._ncols = n
+        return arr
+
+    # replace the expression array expr by an auxiliary var array equal to it,
+    # later builds of the same expression return the var array
+    def share(self, expr, name=""):
+        aux = self.var(expr.shape, name=name)
+        self.con(aux, '=', expr)
+        key = getattr(expr, '_key', None)
+        if key is not None:
+            self._cache[key] = _fresh(aux)
+        return aux
+
+    def _cache_get(self, key):
+        res = self._cache.get(key)
+        if res is None:
+            return None
+        self._cache.move_to_end(key)
+        self._hits[key] = self._hits.get(key, 0) + 1
+        if self.share_after is not None and self._hits[key] == self.share_after and res._key == key:
+            return self.share(res)
+        return _fresh(res)
+
+    def _cache_put(self, key, res):
+        self._cache[key] = res
+        while len(self._cache) > self.cache_size:
+            old, _ = self._cache.popitem(last=False)
+            self._hits.pop(old, None)
 
     # any array of expressions with compatible rhs array
     # sense "=", ">=", or "<="
@@ -83,13 +544,215 @@ class BaseModel:
             self.conidx += 1
         exprs = exprs - rhs
         params = {'exprs':exprs, 'sense':sense, 'name':name}
-        if type(exprs) is np.ndarray:
+        if isinstance(exprs, np.ndarray):
             size = exprs.shape
         else:
             size = []
         self.cons[name] = mkarr(size, self._con_func, params=params)
+        if self.standard_form:
+            self._store_con(exprs, sense)
         return self.cons[name]
 
+    # lower a constraint block exprs sense 0 into the row storage
+    def _store_con(self, exprs, sense):
+        exprs = np.asarray(exprs, dtype=object).ravel().tolist()
+        self._sync()
+        rows, cols, vals = [], [], []
+        const = np.zeros(len(exprs))
+        for i, expr in enumerate(exprs):
+            terms = self._terms(expr)
+            if terms is None:
+                self._linear = False
+                continue
+            rows += [i] * len(terms[0])
+            cols += terms[0]
+            vals += terms[1]
+            const[i] = terms[2]
+        block = sp.csr_matrix((vals, (rows, cols)), shape=(len(exprs), self._ncols))
+        self._store_rows(block, *_row_bounds(sense, -const))
+
+    # append CSR rows to the storage
+    def _store_rows(self, block, lb, ub):
+        m0, m = self._nrows, self._nrows + block.shape[0]
+        p0 = self._indptr[m0]
+        p = p0 + block.nnz
+        self._indptr = _grow(self._indptr, m + 1)
+        self._indices = _grow(self._indices, p)
+        self._data = _grow(self._data, p)
+        self._lb_row = _grow(self._lb_row, m)
+        self._ub_row = _grow(self._ub_row, m)
+        self._indptr[m0 + 1:m + 1] = block.indptr[1:] + p0
+        self._indices[p0:p] = block.indices
+        self._data[p0:p] = block.data
+        self._lb_row[m0:m] = lb
+        self._ub_row[m0:m] = ub
+        self._nrows = m
+
+    # stored rows r0:r1 as a CSR block
+    def _stored_block(self, r0, r1):
+        p0, p1 = self._indptr[r0], self._indptr[r1]
+        return sp.csr_matrix((self._data[p0:p1], self._indices[p0:p1], self._indptr[r0:r1 + 1] - p0),
+                             shape=(r1 - r0, self._ncols))
+
+    # replace stored rows r0:r1 by a block of the same rows (bounds are
+    # kept), or remove them if block is None
+    def _store_replace(self, r0, r1, block=None):
+        m = self._nrows
+        if block is None:
+            block = sp.csr_matrix((0, self._ncols))
+            self._lb_row = np.concatenate((self._lb_row[:r0], self._lb_row[r1:m]))
+            self._ub_row = np.concatenate((self._ub_row[:r0], self._ub_row[r1:m]))
+        block = sp.csr_matrix(block)
+        ip = self._indptr[:m + 1]
+        p0, p1, nnz = ip[r0], ip[r1], ip[m]
+        self._indptr = np.concatenate((ip[:r0 + 1], block.indptr[1:] + p0,
+                                       ip[r1 + 1:] - p1 + p0 + block.nnz)).astype(np.int32)
+        self._indices = np.concatenate((self._indices[:p0], block.indices, self._indices[p1:nnz])).astype(np.int32)
+        self._data = np.concatenate((self._data[:p0], block.data, self._data[p1:nnz]))
+        self._nrows = len(self._indptr) - 1
+
+    # move the values of the stored columns c0:c1 into the row bounds and
+    # empty the columns, or delete them if removed
+    def _store_drop_cols(self, c0, c1, vals, removed):
+        m, n = self._nrows, self._ncols
+        A = self._stored_block(0, m)
+        sub = A[:, c0:c1] @ vals
+        self._lb_row[:m] -= sub
+        self._ub_row[:m] -= sub
+        keep = np.ones(n, dtype=bool)
+        keep[c0:c1] = False
+        if removed:
+            self._obj_const += float(self._c[c0:c1] @ vals)
+            A = A[:, keep]
+            for attr in ('_lb_col', '_ub_col', '_int_col', '_c'):
+                setattr(self, attr, getattr(self, attr)[:n][keep])
+            self._ncols = n - (c1 - c0)
+        else:
+            A = sp.csr_matrix(A.multiply(keep[None, :]))
+            A.eliminate_zeros()
+        self._indptr = A.indptr.astype(np.int32)
+        self._indices = A.indices.astype(np.int32)
+        self._data = A.data
+
+    # row range of a constraint block in the storage
+    def _con_rows(self, name):
+        blocks, offs = self._offsets(self.cons)
+        i = blocks.index(name)
+        return offs[i], offs[i + 1]
+
+    # (c, A, lb_row, ub_row, lb_col, ub_col, integrality, obj_sense, obj_const) of the
+    # linear rows of the model; with standard_form=True as views of the model
+    # storage: the arrays and the buffers of the CSR matrix A share memory
+    # with it until the model grows or a block is removed
+    def to_standard_form(self):
+        if len(self.gcons) > 0:
+            warnings.warn('General constraints are not part of the standard form.')
+        res = self._lower() if not self.standard_form else None
+        if not self._linear or (not self.standard_form and res is None):
+            raise ValueError('The model has nonlinear constraints or objective.')
+        if res is not None:
+            return res
+        m, n = self._nrows, self._ncols
+        nnz = self._indptr[m]
+        A = sp.csr_matrix((self._data[:nnz], self._indices[:nnz], self._indptr[:m + 1]), shape=(m, n), copy=False)
+        return (self._c[:n], A, self._lb_row[:m], self._ub_row[:m],
+                self._lb_col[:n], self._ub_col[:n], self._int_col[:n], self._sense, self._obj_const)
+
+    #### general constraints over tensors
+    # indicator and pwl return the added blocks as {block name: constraints}
+    # Z == val -> X sense rhs, elementwise after broadcasting
+    # M bounds |X - rhs| for the big-M fallback
+    def indicator(self, Z, X, sense, rhs=0, val=1, M=None, name=""):
+        name = self._gcon_name(name)
+        Z, exprs = np.broadcast_arrays(np.asarray(Z, dtype=object), np.asarray(X - rhs, dtype=object))
+        cons = [self._sense_con(expr, sense) for expr in exprs.ravel().tolist()]
+        res = self._indicators(Z.ravel().tolist(), val, cons, self._item_names(name, Z.shape))
+        if res is not None:
+            self.gcons[name] = np.array(res, dtype=object).reshape(Z.shape)
+            return {name: self.gcons[name]}
+        if M is None:
+            raise ValueError('Input "M" is required for the big-M indicator formulation.')
+        off = M * (1 - Z) if val == 1 else M * Z
+        res = {}
+        if sense in ('=', '==', '<='):
+            res[name + '_ub'] = self.con(exprs, '<=', off, name=name + '_ub')
+        if sense in ('=', '==', '>='):
+            res[name + '_lb'] = self.con(exprs, '>=', -off, name=name + '_lb')
+        return res
+
+    # Y = f(X) elementwise, f piecewise linear through (bx, by)
+    # bx, by: breakpoints of shape (K,) or X.shape + (K,)
+    def pwl(self, Y, X, bx, by, name=""):
+        name = self._gcon_name(name)
+        X, Y = np.asarray(X, dtype=object), np.asarray(Y, dtype=object)
+        bx = np.broadcast_to(np.asarray(bx, dtype=float), X.shape + np.shape(bx)[-1:])
+        by = np.broadcast_to(np.asarray(by, dtype=float), bx.shape)
+        K = bx.shape[-1]
+        res = self._pwls(Y.ravel().tolist(), X.ravel().tolist(), bx.reshape(-1, K).tolist(),
+                         by.reshape(-1, K).tolist(), self._item_names(name, X.shape))
+        if res is not None:
+            self.gcons[name] = np.array(res, dtype=object).reshape(X.shape)
+            return {name: self.gcons[name]}
+        # convex combination of breakpoints on one active segment
+        L = self.var(X.shape + (K,), lb=0, ub=1, name=name + '_l')
+        D = self.var(X.shape + (K - 1,), vtype='B', name=name + '_d')
+        zero = np.zeros(X.shape + (1,), dtype=object)
+        D = np.concatenate((zero, D, zero), axis=-1)
+        res = {}
+        res[name + '_lsum'] = self.con(L.sum(axis=-1), '=', 1, name=name + '_lsum')
+        res[name + '_dsum'] = self.con(D.sum(axis=-1), '=', 1, name=name + '_dsum')
+        res[name + '_adj'] = self.con(L, '<=', D[..., :-1] + D[..., 1:], name=name + '_adj')
+        res[name + '_x'] = self.con(X, '=', (L * bx).sum(axis=-1), name=name + '_x')
+        res[name + '_y'] = self.con(Y, '=', (L * by).sum(axis=-1), name=name + '_y')
+        return res
+
+    # binary R = AND of binary X along axis
+    def and_(self, X, axis=-1, name=""):
+        return self._gen_func('and', X, axis, None, name)
+
+    # binary R = OR of binary X along axis
+    def or_(self, X, axis=-1, name=""):
+        return self._gen_func('or', X, axis, None, name)
+
+    # R = max of X along axis, M bounds the spread of X for the big-M fallback
+    def max_(self, X, axis=-1, M=None, name=""):
+        return self._gen_func('max', X, axis, M, name)
+
+    # R = min of X along axis, M bounds the spread of X for the big-M fallback
+    def min_(self, X, axis=-1, M=None, name=""):
+        return self._gen_func('min', X, axis, M, name)
+
+    def _gen_func(self, kind, X, axis, M, name):
+        name = self._gcon_name(name)
+        X = np.moveaxis(np.asarray(X, dtype=object), axis, -1)
+        vtype = 'B' if kind in ('and', 'or') else 'C'
+        R = self.var(X.shape[:-1], vtype=vtype, name=name)
+        res = self._gen_funcs(kind, np.ravel(R).tolist(), X.reshape(-1, X.shape[-1]).tolist(),
+                              self._item_names(name + '_' + kind, R.shape))
+        if res is not None:
+            self.gcons[name + '_' + kind] = np.array(res, dtype=object).reshape(R.shape)
+            return R
+        R1 = R[..., None]
+        if kind == 'and':
+            self.con(R1, '<=', X, name=name + '_ub')
+            self.con(R, '>=', X.sum(axis=-1) - (X.shape[-1] - 1), name=name + '_lb')
+        elif kind == 'or':
+            self.con(R1, '>=', X, name=name + '_lb')
+            self.con(R, '<=', X.sum(axis=-1), name=name + '_ub')
+        else:
+            if M is None:
+                raise ValueError('Input "M" is required for the big-M %s formulation.' % kind)
+            # D selects the element attaining the max/min
+            D = self.var(X.shape, vtype='B', name=name + '_d')
+            self.con(D.sum(axis=-1), '=', 1, name=name + '_dsum')
+            if kind == 'max':
+                self.con(R1, '>=', X, name=name + '_lb')
+                self.con(R1, '<=', X + M * (1 - D), name=name + '_ub')
+            else:
+                self.con(R1, '<=', X, name=name + '_ub')
+                self.con(R1, '>=', X - M * (1 - D), name=name + '_lb')
+        return R
+
     # add a set of constraints
     def conSet(self, cons):
         res = []
@@ -103,25 +766,38 @@ class BaseModel:
         #     sense = gp.GRB.MINIMIZE
         # else:
         #     sense = gp.GRB.MAXIMIZE
-        if type(expr) is np.ndarray:
+        if isinstance(expr, np.ndarray):
             expr = expr[0]
         self._set_obj(self.sensemap[sense], expr)
+        if not self.standard_form:
+            return None
+        self._sync()
+        terms = self._terms(expr)
+        self._c[:self._ncols] = 0
+        if terms is None:
+            self._linear = False
+        else:
+            np.add.at(self._c, np.array(terms[0], dtype=int), terms[1])
+            self._obj_const = float(terms[2])
+        self._sense = sense
 
     # solve
-    def solve(self, params={}, timing=False, tname='time', withKey=True):
+    def solve(self, params={}, timing=False, tname='time', withKey=True, pool=False):
         try:
             for param, value in params.items():
                 self.md.setParam(param, value)
         except (TypeError, ValueError):
             raise ValueError('Incorrect parameters or values.')  
+        # fill the solution pool or solve for a single solution
+        md_solve = self._md_populate if pool else self._md_solve
         if timing:
             sw = Stopwatch()
             sw.init(start=True, name=tname)
-            self._md_solve()
+            md_solve()
             sw.lap()
             res = self.obj_val(), sw.info(2, withKey=withKey)
         else:
-            self._md_solve()
+            md_solve()
             if self.status() in self.statusmap['optimal'] or self.status() in self.statusmap['feasible']:
                 res = self.obj_val()
             else:
@@ -131,17 +807,212 @@ class BaseModel:
 
     # get variable values
     def var_val(self, var):
-        func_vec = np.vectorize(self._var_val)
         if type(var) is str:
             var = self.vars[var]
-        return func_vec(var)
+        var = np.asarray(var)
+        return np.array(self._var_vals(var.ravel().tolist()), dtype=float).reshape(var.shape)
+
+    # top-k pool solutions of var as a (k, *var.shape) array and their objective values
+    # k can be smaller if the pool holds fewer solutions
+    def solutions(self, var, k):
+        if type(var) is str:
+            var = self.vars[var]
+        var = np.asarray(var)
+        num = self._pool_num()
+        objs = np.array([self._pool_obj(i) for i in range(num)], dtype=float)
+        order = np.argsort(objs if self._obj_sense() == 'min' else -objs, kind='stable')[:k]
+        mvars = var.ravel().tolist()
+        vals = np.array([self._pool_vals(i, mvars) for i in order.tolist()], dtype=float)
+        return vals.reshape((len(order),) + var.shape), objs[order]
+
+    # set start values of an array of variables
+    def warm_start(self, var, values):
+        if type(var) is str:
+            var = self.vars[var]
+        var = np.asarray(var)
+        self._warm_start(var.ravel().tolist(), np.broadcast_to(values, var.shape).ravel().tolist())
+
+    #### bulk model modification
+    # set bounds of an array of variables, None keeps the current bound
+    def set_bounds(self, var, lb=None, ub=None):
+        if type(var) is str:
+            var = self.vars[var]
+        var = np.asarray(var)
+        vlist = var.ravel().tolist()
+        if lb is not None:
+            lb = np.broadcast_to(lb, var.shape).ravel()
+            self._set_bounds(vlist, 'lb', lb.tolist())
+        if ub is not None:
+            ub = np.broadcast_to(ub, var.shape).ravel()
+            self._set_bounds(vlist, 'ub', ub.tolist())
+        if self.standard_form:
+            cols = self._var_cols(vlist)
+            if lb is not None:
+                self._lb_col[cols] = lb
+            if ub is not None:
+                self._ub_col[cols] = ub
+
+    # fix an array of variables to values
+    def fix(self, var, values):
+        self.set_bounds(var, lb=values, ub=values)
+
+    # remove a block of fixed variables by name, their values are moved into
+    # the rows using them; docplex can not delete variables, so with cplex
+    # the columns stay in the model, empty and fixed
+    def remove_fixed(self, name):
+        mvars = np.asarray(self.vars[name]).ravel().tolist()
+        lb, ub = self._var_bounds(mvars)
+        if np.any(lb != ub):
+            raise ValueError('Only fixed variables can be removed.')
+        blocks, offs = self._offsets(self.vars)
+        i = blocks.index(name)
+        removed = self._remove_vars(mvars, lb)
+        if self.standard_form:
+            self._store_drop_cols(offs[i], offs[i + 1], lb, removed)
+        if removed:
+            self.vars.pop(name)
+
+    # remove a constraint block by name
+    def remove(self, name):
+        if self.standard_form:
+            self._store_replace(*self._con_rows(name))
+        cons = self.cons.pop(name)
+        self._remove(np.asarray(cons).ravel().tolist())
+
+    # add sparse_delta to the coefficients of constraint block name
+    # sparse_delta: scipy sparse matrix or (rows, cols, vals) triplet,
+    # rows index the flattened block and cols the model columns
+    def update_coeffs(self, name, sparse_delta):
+        if hasattr(sparse_delta, 'tocoo'):
+            delta = sparse_delta.tocoo()
+            rows, cols, vals = delta.row, delta.col, delta.data
+        else:
+            rows, cols, vals = sparse_delta
+        rows = np.asarray(rows, dtype=int)
+        vals = np.broadcast_to(vals, rows.shape)
+        cols = np.asarray(cols, dtype=int)
+        # sum duplicate entries, the solver coefficients are set once per entry
+        delta = sp.coo_matrix((vals, (rows, cols))).tocsr().tocoo()
+        rows, cols, vals = delta.row, delta.col, delta.data
+        cons = np.asarray(self.cons[name]).ravel()[rows]
+        mvars = self._col_vars(cols)
+        self._chg_coeffs(cons.tolist(), mvars.tolist(), vals.tolist())
+        if not self.standard_form:
+            return None
+        r0, r1 = self._con_rows(name)
+        delta = sp.csr_matrix((vals, (rows, cols)), shape=(r1 - r0, self._ncols))
+        self._store_replace(r0, r1, self._stored_block(r0, r1) + delta)
+
+    # model columns of a list of variables
+    def _var_cols(self, mvars):
+        self._sync()
+        return np.array([var.index for var in mvars], dtype=int)
+
+    # variable objects of model columns
+    def _col_vars(self, cols):
+        res = np.empty(len(cols), dtype=object)
+        for key, (pos, idx) in self.locate(cols).items():
+            res[pos] = self.vars[key][idx]
+        return res
+
+    # split an array over all model columns into the variable blocks
+    def _split(self, x):
+        blocks, offs = self._offsets(self.vars)
+        res = {}
+        for i, key in enumerate(blocks):
+            res[key] = x[offs[i]:offs[i + 1]].reshape(self.vars[key].shape)
+        return res
+
+    # load a model from standard form arrays in bulk, A is a sparse matrix
+    # with lb_row <= A x <= ub_row, return the new variable array x
+    def load(self, c, A, lb_row, ub_row, lb_col, ub_col, integrality=None, sense='min', name='x', obj_const=0):
+        A = sp.csr_matrix(A)
+        m, n = A.shape
+        lb_col = np.broadcast_to(np.asarray(lb_col, dtype=float), n)
+        ub_col = np.broadcast_to(np.asarray(ub_col, dtype=float), n)
+        integ = np.zeros(n) if integrality is None else np.broadcast_to(integrality, n)
+        vtype = np.where(integ != 0, np.where((lb_col >= 0) & (ub_col <= 1), 'B', 'I'), 'C')
+        mvars = self._load_vars(lb_col, ub_col, vtype, name)
+        if mvars is None:
+            x = self.var(n, lb=lb_col, ub=ub_col, vtype=vtype, name=name)
+        else:
+            x = np.empty(n, dtype=object)
+            x[:] = mvars
+            x = self._add_var(name, x, lb_col, ub_col, vtype)
+        lb_row = np.broadcast_to(np.asarray(lb_row, dtype=float), m)
+        ub_row = np.broadcast_to(np.asarray(ub_row, dtype=float), m)
+        nz = np.diff(A.indptr) > 0
+        if np.any(~nz & ((lb_row > 0) | (ub_row < 0))):
+            raise ValueError('Rows without nonzeros have infeasible bounds.')
+        eq = nz & (lb_row == ub_row)
+        le = nz & np.isfinite(ub_row) & ~eq
+        ge = nz & np.isfinite(lb_row) & ~eq
+        # first model column of x
+        c0 = self._ncols - n
+        self._load_con(name + '_eq', A[eq], x, c0, '=', ub_row[eq])
+        self._load_con(name + '_le', A[le], x, c0, '<=', ub_row[le])
+        self._load_con(name + '_ge', A[ge], x, c0, '>=', lb_row[ge])
+        c = np.broadcast_to(np.asarray(c, dtype=float), n)
+        nzc = np.flatnonzero(c)
+        items = np.asarray(x)[nzc]
+        expr = _linexpr_func(items)(c[nzc].tolist(), items.tolist()) if len(nzc) > 0 else 0
+        self.obj(expr + float(obj_const), sense)
+        return x
+
+    # add the rows B x sense rhs as constraint block name, x starts at
+    # model column c0
+    def _load_con(self, name, B, x, c0, sense, rhs):
+        cons = self._load_rows(B, np.asarray(x).tolist(), sense, rhs, name)
+        if cons is None:
+            B = B.tocoo()
+            exprs = _build_exprs(np.asarray(x), B.row, B.col, B.data, (B.shape[0],))
+            self.con(exprs, sense, rhs, name=name)
+            return None
+        self.cons[name] = np.empty(len(cons), dtype=object)
+        self.cons[name][:] = cons
+        if self.standard_form:
+            B = sp.csr_matrix((B.data, B.indices + c0, B.indptr), shape=(B.shape[0], self._ncols))
+            self._store_rows(B, *_row_bounds(sense, rhs))
+
+    #### decomposition
+    # label the columns by block, -1 marks linking (first-stage) columns
+    # axes: {var name: axis} tags the block axis of var tensors, untagged
+    #   tensors are linking; if None, blocks are the connected components
+    #   after dropping rows with more than link_frac * #columns nonzeros
+    def decompose(self, axes=None, link_frac=0.1):
+        if axes is not None:
+            labels = np.full(self.varnum(), -1)
+            blocks, offs = self._offsets(self.vars)
+            for i, key in enumerate(blocks):
+                if key in axes:
+                    shape = self.vars[key].shape
+                    labels[offs[i]:offs[i + 1]] = np.indices(shape)[axes[key]].ravel()
+            return labels
+        A = self.to_standard_form()[1]
+        nnz = np.diff(A.indptr)
+        A = A[(nnz <= link_frac * A.shape[1]) | (nnz <= 1)]
+        return _components(A)
+
+    # solve the model by decomposition, return the objective value
+    # (a bound for 'lagrangian') and the solution arrays by var name
+    # mode 'benders' needs tagged axes; the untagged vars are the first stage
+    def decomp_solve(self, mode='lagrangian', axes=None, link_frac=0.1, iters=100, tol=1e-6, step=1.0, workers=None):
+        labels = self.decompose(axes=axes, link_frac=link_frac)
+        data = self.to_standard_form()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            if mode == 'lagrangian':
+                val, x = _lagrangian(self.solver, data[:8], labels, pool, iters, tol, step)
+            elif mode == 'benders':
+                val, x = _benders(self.solver, data[:8], labels, pool, iters, tol)
+            else:
+                raise ValueError('Input "mode" should be lagrangian or benders.')
+        return val + data[8], self._split(x)
 
     # create single variable from parameters
     def _var_func(self, idx, lb, ub, vtype, name):
-        if len(idx) == 0:
-            name = name
-        else:
-            name = name+str(idx)
+        name = self.item_name(name, idx) if self.names else ""
+        if isinstance(vtype, np.ndarray):
+            vtype = vtype[tuple(idx)]
         if hasattr(lb, '__iter__'):
             lb = lb[tuple(idx)]
         if hasattr(ub, '__iter__'):
@@ -152,10 +1023,13 @@ class BaseModel:
     def _con_func(self, idx, exprs, sense, name):
         if len(idx) == 0:
             expr = exprs
-            name = name
         else:
             expr = exprs[tuple(idx)]
-            name = name+str(idx)
+        name = self.item_name(name, idx) if self.names else ""
+        return self._con_init(self._sense_con(expr, sense), name)
+
+    # single constraint expr sense 0
+    def _sense_con(self, expr, sense):
         if sense == '=' or sense == '==':
             con = expr == 0
         elif sense == '<=':
@@ -164,7 +1038,19 @@ class BaseModel:
             con = expr >= 0
         else:
             warnings.warn('Input "sense" should be =, >=, or <=.')
-        return self._con_init(con, name)
+        return con
+
+    # element names of a block, generated only if names are passed to the solver
+    def _item_names(self, name, shape):
+        if not self.names:
+            return [""] * int(np.prod(shape, dtype=int))
+        return [self.item_name(name, idx) for idx in np.ndindex(*shape)]
+
+    def _gcon_name(self, name):
+        if name is None or name == "":
+            name = "gcon" + str(self.gconidx)
+            self.gconidx += 1
+        return name
 
     #### public functions to be implemented
     # set gurobi parameters
@@ -227,21 +1113,108 @@ class BaseModel:
     def _var_val(self, var):
         return var.x
 
+    # get values of a list of variables in bulk
+    def _var_vals(self, mvars):
+        return [self._var_val(var) for var in mvars]
+
+    # solve and fill the solution pool
+    def _md_populate(self):
+        return self._md_solve()
+
+    # number of solutions in the pool
+    def _pool_num(self):
+        pass
+
+    # objective value of pool solution i
+    def _pool_obj(self, i):
+        pass
+
+    # values of a list of variables in pool solution i
+    def _pool_vals(self, i, mvars):
+        pass
+
+    # 'min' or 'max'
+    def _obj_sense(self):
+        pass
+
     def _var_init(self, lb, ub, vtype, name):
         pass
 
     def _con_init(self, con, name):
         pass
 
+    # set bound ('lb' or 'ub') of variables in bulk
+    def _set_bounds(self, mvars, bound, vals):
+        pass
+
+    # remove constraints in bulk
+    def _remove(self, cons):
+        pass
+
+    # (lb, ub) arrays of variables
+    def _var_bounds(self, mvars):
+        pass
+
+    # substitute the values of variables into the linear rows and delete
+    # them, return False if the solver keeps the (empty) columns
+    def _remove_vars(self, mvars, vals):
+        pass
+
+    # add deltas to the coefficients of (constraint, variable) pairs
+    def _chg_coeffs(self, cons, mvars, deltas):
+        pass
+
+    def _warm_start(self, mvars, vals):
+        pass
+
+    # reduced costs of variables
+    def _var_rc(self, mvars):
+        pass
+
+    # native general constraints in bulk, return None to use the
+    # big-M/SOS2 fallback formulations
+    def _indicators(self, zs, val, cons, names):
+        pass
+
+    def _pwls(self, ys, xs, bxs, bys, names):
+        pass
+
+    # kind: 'and', 'or', 'max' or 'min'
+    def _gen_funcs(self, kind, rs, xs, names):
+        pass
+
+    # read the standard form back from the solver, None if nonlinear
+    def _lower(self):
+        pass
+
+    # make pending variables visible (indices valid)
+    def _sync(self):
+        pass
+
+    # (columns, coefficients, constant) of a linear expression, None if nonlinear
+    def _terms(self, expr):
+        pass
+
+    # add columns in bulk, return the list of vars or None for the generic path
+    def _load_vars(self, lb, ub, vtype, name):
+        pass
+
+    # add rows B x sense rhs in bulk, return the list of constraints or None
+    # for the generic path
+    def _load_rows(self, B, mvars, sense, rhs, name):
+        pass
+
 
 #### Gurobi Wrapper
 # main model
 class GrbModel(BaseModel):
-    def __init__(self, name="", grb_display=0, **args):
+    solver = 'gurobi'
+
+    def __init__(self, name="", grb_display=0, names=True, cache_size=0, share_after=None, standard_form=False, **args):
         self.env = gp.Env(empty=True)
         self.env.setParam('OutputFlag', grb_display)
         self.env.start()
-        super().__init__(name=name) 
+        super().__init__(name=name, names=names, cache_size=cache_size, share_after=share_after, standard_form=standard_form)
 
     def _set_params(self, pkey, val, *args):
         self.md.setParam(pkey, val)
@@ -289,7 +1262,10 @@ class GrbModel(BaseModel):
             'crossover': ('Crossover',),
             'bar_iter_lmt': ('BarIterLimit',),
             'bar_conv_tol': ('BarConvTol',),
-            'time_lmt': ('TimeLimit',)
+            'time_lmt': ('TimeLimit',),
+            'pool_size': ('PoolSolutions',),
+            'pool_gap': ('PoolGap',),
+            'pool_mode': ('PoolSearchMode', {'incidental': 0, 'more': 1, 'best': 2})
         }
         return typemap, sensemap, statusmap, paramsmap
 
@@ -303,22 +1279,145 @@ class GrbModel(BaseModel):
     def _var_val(self, var):
         return var.x
 
+    def _var_vals(self, mvars):
+        return self.md.getAttr('X', mvars)
+
+    def _pool_num(self):
+        return self.md.SolCount
+
+    def _pool_obj(self, i):
+        self.md.setParam('SolutionNumber', i)
+        return self.md.PoolObjVal
+
+    def _pool_vals(self, i, mvars):
+        self.md.setParam('SolutionNumber', i)
+        return self.md.getAttr('Xn', mvars)
+
+    def _obj_sense(self):
+        return 'min' if self.md.ModelSense == gp.GRB.MINIMIZE else 'max'
+
     def _var_init(self, lb, ub, vtype, name):
         return self.md.addVar(lb=lb, ub=ub, vtype=self.typemap[vtype], name=name)
 
     def _con_init(self, con, name):
         return self.md.addConstr(con, name=name)
 
+    def _set_bounds(self, mvars, bound, vals):
+        self.md.setAttr(bound.upper(), mvars, vals)
+
+    def _remove(self, cons):
+        self.md.remove(cons)
+
+    def _var_bounds(self, mvars):
+        self.md.update()
+        return np.array(self.md.getAttr('LB', mvars)), np.array(self.md.getAttr('UB', mvars))
+
+    def _remove_vars(self, mvars, vals):
+        self.md.update()
+        rhs = {}
+        for var, val in zip(mvars, vals.tolist()):
+            col = self.md.getCol(var)
+            for i in range(col.size()):
+                con = col.getConstr(i)
+                rhs[con] = rhs.get(con, 0) + col.getCoeff(i) * val
+        cons = list(rhs)
+        if len(cons) > 0:
+            self.md.setAttr('RHS', cons, [con.RHS - rhs[con] for con in cons])
+        # keep the objective value of the fixed variables as a constant
+        self.md.ObjCon += float(np.dot(self.md.getAttr('Obj', mvars), vals))
+        self.md.remove(mvars)
+        return True
+
+    def _chg_coeffs(self, cons, mvars, deltas):
+        self.md.update()
+        vals = [self.md.getCoeff(con, var) + d for con, var, d in zip(cons, mvars, deltas)]
+        for con, var, val in zip(cons, mvars, vals):
+            self.md.chgCoeff(con, var, val)
+
+    def _warm_start(self, mvars, vals):
+        self.md.setAttr('Start', mvars, vals)
+
+    def _var_rc(self, mvars):
+        return self.md.getAttr('RC', mvars)
+
+    # gurobi indicators only take binary variables
+    def _indicators(self, zs, val, cons, names):
+        if not all(isinstance(var, gp.Var) for var in zs):
+            return None
+        return [self.md.addGenConstrIndicator(z, val, con, name=name) for z, con, name in zip(zs, cons, names)]
+
+    # gurobi pwl and function constraints only take variables
+    def _pwls(self, ys, xs, bxs, bys, names):
+        if not all(isinstance(var, gp.Var) for var in xs + ys):
+            return None
+        return [self.md.addGenConstrPWL(x, y, bx, by, name=name) for x, y, bx, by, name in zip(xs, ys, bxs, bys, names)]
+
+    def _gen_funcs(self, kind, rs, xs, names):
+        if not all(isinstance(var, gp.Var) for row in xs for var in row):
+            return None
+        func = {
+            'and': self.md.addGenConstrAnd,
+            'or': self.md.addGenConstrOr,
+            'max': self.md.addGenConstrMax,
+            'min': self.md.addGenConstrMin
+        }[kind]
+        return [func(r, x, name=name) for r, x, name in zip(rs, xs, names)]
+
+    def _lower(self):
+        self.md.update()
+        if self.md.NumQConstrs > 0 or self.md.NumQNZs > 0:
+            return None
+        mvars = self.md.getVars()
+        cons = self.md.getConstrs()
+        A = self.md.getA().tocsr()
+        c = np.array(self.md.getAttr('Obj', mvars))
+        lb_col = np.array(self.md.getAttr('LB', mvars))
+        ub_col = np.array(self.md.getAttr('UB', mvars))
+        integ = (np.array(self.md.getAttr('VType', mvars), dtype=str) != 'C').astype(np.int8)
+        rhs = np.array(self.md.getAttr('RHS', cons))
+        sense = np.array(self.md.getAttr('Sense', cons), dtype=str)
+        lb_row = np.where(sense == '<', -np.inf, rhs)
+        ub_row = np.where(sense == '>', np.inf, rhs)
+        return c, A, lb_row, ub_row, lb_col, ub_col, integ, self._obj_sense(), self.md.ObjCon
+
+    def _sync(self):
+        self.md.update()
+
+    def _terms(self, expr):
+        if isinstance(expr, gp.Var):
+            return [expr.index], [1.0], 0.0
+        if isinstance(expr, gp.LinExpr):
+            n = expr.size()
+            return [expr.getVar(i).index for i in range(n)], [expr.getCoeff(i) for i in range(n)], expr.getConstant()
+        if isinstance(expr, (int, float, np.number)):
+            return [], [], float(expr)
+        return None
+
+    def _load_vars(self, lb, ub, vtype, name):
+        return self.md.addMVar(len(lb), lb=lb, ub=ub, vtype=vtype, name=name if self.names else "").tolist()
+
+    def _load_rows(self, B, mvars, sense, rhs, name):
+        if B.shape[0] == 0:
+            return []
+        sense = {'=': '=', '<=': '<', '>=': '>'}[sense]
+        return self.md.addMConstr(B, gp.MVar.fromlist(mvars), sense, rhs, name=name if self.names else "").tolist()
+
 
 #### Cplex Wrapper
 # main model
 class CpxModel(BaseModel):
-    def __init__(self, name="", **args):
-        super().__init__(name=name) 
+    solver = 'cplex'
+
+    def __init__(self, name="", names=True, cache_size=0, share_after=None, standard_form=False, **args):
+        super().__init__(name=name, names=names, cache_size=cache_size, share_after=share_after, standard_form=standard_form)
 
     def _set_params(self, pkey, val, pth):
         param_obj = self._get_param_obj(pth)
         setattr(param_obj, pkey, val)
+        # the pool keeps the first solutions found unless told to replace the
+        # worst ones, needed for the 'best' pool mode
+        if pth == ['mip', 'pool'] and pkey == 'intensity':
+            param_obj.replace = 1 if val == 4 else 0
 
     def _get_params(self, pkey, pth):
         param_obj = self._get_param_obj(pth)
@@ -370,7 +1469,10 @@ class CpxModel(BaseModel):
             'crossover': (['barrier', 'crossover'],),
             'bar_iter_lmt': (['barrier', 'limits', 'iteration'],),
             'bar_conv_tol': (['barrier', 'convergetol'],),
-            'time_lmt': (['timelimit'],)
+            'time_lmt': (['timelimit'],),
+            'pool_size': (['mip', 'pool', 'capacity'],),
+            'pool_gap': (['mip', 'pool', 'relgap'],),
+            'pool_mode': (['mip', 'pool', 'intensity'], {'incidental': 1, 'more': 2, 'best': 4})
         }
         return typemap, sensemap, statusmap, paramsmap
 
@@ -384,8 +1486,484 @@ class CpxModel(BaseModel):
     def _var_val(self, var):
         return self.md.solution.get_value(var)
 
+    def _var_vals(self, mvars):
+        return self.md.solution.get_values(mvars)
+
+    # populate reuses the tree of the solve, which sets the solve status
+    def _md_populate(self):
+        self.md.solve()
+        return self.md.populate_solution_pool()
+
+    def _pool_num(self):
+        return self.md.get_cplex().solution.pool.get_num()
+
+    def _pool_obj(self, i):
+        return self.md.get_cplex().solution.pool.get_objective_value(i)
+
+    def _pool_vals(self, i, mvars):
+        return self.md.get_cplex().solution.pool.get_values(i, [var.index for var in mvars])
+
+    def _obj_sense(self):
+        return 'min' if self.md.is_minimized() else 'max'
+
     def _var_init(self, lb, ub, vtype, name):
-        return self.typemap[vtype](name=name, lb=lb, ub=ub)
+        # docplex binary vars take no bounds, set them clipped to [0, 1]
+        if vtype == 'B':
+            var = self.typemap[vtype](name=name or None)
+            var.lb = max(lb, 0)
+            var.ub = min(ub, 1)
+            return var
+        return self.typemap[vtype](name=name or None, lb=lb, ub=ub)
 
     def _con_init(self, con, name):
-        return self.md.add_constraint(con, ctname=name)
+        return self.md.add_constraint(con, ctname=name or None)
+
+    def _set_bounds(self, mvars, bound, vals):
+        if bound == 'lb':
+            self.md.change_var_lower_bounds(mvars, vals)
+        else:
+            self.md.change_var_upper_bounds(mvars, vals)
+
+    def _remove(self, cons):
+        self.md.remove_constraints(cons)
+
+    def _var_bounds(self, mvars):
+        return self._inf([var.lb for var in mvars]), self._inf([var.ub for var in mvars])
+
+    def _remove_vars(self, mvars, vals):
+        vals = {var.index: val for var, val in zip(mvars, vals.tolist())}
+        for ct in list(self.md.iter_linear_constraints()):
+            terms, const = self._row_terms(ct)
+            if not any(idx in vals for idx in terms):
+                continue
+            const += sum(coef * vals[idx] for idx, (_, coef) in terms.items() if idx in vals)
+            self._set_row(ct, {idx: term for idx, term in terms.items() if idx not in vals}, const)
+        return False
+
+    # {var index: (var, coef)} and constant of a row moved to the left side
+    def _row_terms(self, ct):
+        terms = {}
+        for expr, sign in ((ct.left_expr, 1), (ct.right_expr, -1)):
+            for var, coef in expr.iter_terms():
+                old = terms[var.index][1] if var.index in terms else 0
+                terms[var.index] = (var, old + sign * coef)
+        return terms, ct.left_expr.get_constant() - ct.right_expr.get_constant()
+
+    # set a row to terms + const sense 0, dropping zero coefficients
+    def _set_row(self, ct, terms, const):
+        terms = [(var, coef) for var, coef in terms.values() if coef != 0]
+        ct.left_expr = self.md.scal_prod([var for var, _ in terms], [coef for _, coef in terms]) + const
+        ct.right_expr = 0
+
+    # docplex does not pass coefficients cancelled to 0 to the engine, so
+    # the changed rows are rebuilt
+    def _chg_coeffs(self, cons, mvars, deltas):
+        rows = {}
+        for con, var, d in zip(cons, mvars, deltas):
+            if con.index not in rows:
+                rows[con.index] = (con,) + self._row_terms(con)
+            terms = rows[con.index][1]
+            coef = terms[var.index][1] + d if var.index in terms else d
+            terms[var.index] = (var, coef)
+        for con, terms, const in rows.values():
+            self._set_row(con, terms, const)
+
+    def _warm_start(self, mvars, vals):
+        # docplex only accepts starts on discrete variables
+        start = {var: val for var, val in zip(mvars, vals) if var.is_discrete()}
+        if len(start) > 0:
+            self.md.add_mip_start(SolveSolution(self.md, start))
+
+    def _var_rc(self, mvars):
+        return self.md.reduced_costs(mvars)
+
+    # pwl and logical functions in docplex add hidden columns, use the fallbacks
+    def _indicators(self, zs, val, cons, names):
+        if not all(isinstance(var, CpxVar) for var in zs):
+            return None
+        return self.md.add_indicators(zs, cons, true_values=val, names=names if self.names else None)
+
+    # read from the docplex objects, the engine is only synced at solve
+    def _lower(self):
+        if self.md.number_of_quadratic_constraints > 0 or self.md.objective_expr.is_quad_expr():
+            return None
+        mvars = list(self.md.iter_variables())
+        rows, cols, vals, sense, rhs = [], [], [], [], []
+        for i, ct in enumerate(self.md.iter_linear_constraints()):
+            lcols, lvals, lconst = self._terms(ct.left_expr)
+            rcols, rvals, rconst = self._terms(ct.right_expr)
+            rows += [i] * (len(lcols) + len(rcols))
+            cols += lcols + rcols
+            vals += lvals + [-v for v in rvals]
+            sense.append(ct.sense.operator_symbol)
+            rhs.append(rconst - lconst)
+        A = sp.csr_matrix((vals, (rows, cols)), shape=(len(rhs), len(mvars)))
+        c = np.zeros(len(mvars))
+        terms = self._terms(self.md.objective_expr)
+        np.add.at(c, np.array(terms[0], dtype=int), terms[1])
+        lb_col = np.array([var.lb for var in mvars], dtype=float)
+        ub_col = np.array([var.ub for var in mvars], dtype=float)
+        integ = np.array([var.is_discrete() for var in mvars], dtype=np.int8)
+        rhs, sense = np.array(rhs, dtype=float), np.array(sense, dtype=str)
+        lb_row = np.where(sense == '<=', -np.inf, rhs)
+        ub_row = np.where(sense == '>=', np.inf, rhs)
+        return (c, A, lb_row, ub_row, self._inf(lb_col), self._inf(ub_col), integ, self._obj_sense(),
+                float(terms[2]))
+
+    # cplex uses +-1e20 as infinity
+    def _inf(self, vals):
+        vals = np.array(vals, dtype=float)
+        return np.where(vals >= 1e20, np.inf, np.where(vals <= -1e20, -np.inf, vals))
+
+    def _terms(self, expr):
+        if isinstance(expr, LinearOperand):
+            cols, coefs = [], []
+            for var, coef in expr.iter_terms():
+                cols.append(var.index)
+                coefs.append(coef)
+            return cols, coefs, expr.get_constant()
+        if isinstance(expr, (int, float, np.number)):
+            return [], [], float(expr)
+        return None
+
+    def _load_vars(self, lb, ub, vtype, name):
+        names = self._item_names(name, (len(lb),)) if self.names else None
+        mvars = self.md.continuous_var_list(len(lb), lb=lb.tolist(), ub=ub.tolist(), name=names)
+        disc = np.flatnonzero(vtype != 'C')
+        if len(disc) > 0:
+            self.md.change_var_types([mvars[i] for i in disc], vtype[disc].tolist())
+        return mvars
+
+    def _load_rows(self, B, mvars, sense, rhs, name):
+        B = B.tocoo()
+        exprs = _build_exprs(np.array(mvars + [None], dtype=object)[:-1], B.row, B.col, B.data, (B.shape[0],))
+        cts = [self._sense_con(expr - r, sense) for expr, r in zip(exprs.tolist(), rhs.tolist())]
+        names = self._item_names(name, (len(cts),)) if self.names else None
+        return self.md.add_constraints(cts, names=names)
+
+
+#### Standard form helpers
+# grow a storage array to at least n entries, doubling its capacity
+def _grow(arr, n):
+    if len(arr) >= n:
+        return arr
+    res = np.zeros(max(n, 2 * len(arr)), dtype=arr.dtype)
+    res[:len(arr)] = arr
+    return res
+
+
+# row bounds of rows a x sense rhs
+def _row_bounds(sense, rhs):
+    rhs = np.asarray(rhs, dtype=float)
+    lb = rhs if sense in ('=', '==', '>=') else np.full(rhs.shape, -np.inf)
+    ub = rhs if sense in ('=', '==', '<=') else np.full(rhs.shape, np.inf)
+    return lb, ub
+
+
+#### Decomposition helpers
+# connected components of the columns of A, by min-label propagation
+def _components(A):
+    A = A.tocoo()
+    labels = np.arange(A.shape[1])
+    while True:
+        rmin = np.full(A.shape[0], A.shape[1])
+        np.minimum.at(rmin, A.row, labels[A.col])
+        new = labels.copy()
+        np.minimum.at(new, A.col, rmin[A.row])
+        new = new[new]
+        if np.array_equal(new, labels):
+            break
+        labels = new
+    return np.unique(labels, return_inverse=True)[1]
+
+
+# smallest and largest column label of each row of A, empty rows get (-2, -2)
+def _row_span(A, labels):
+    nnz = np.diff(A.indptr)
+    rows = np.repeat(np.arange(A.shape[0]), nnz)
+    lo = np.full(A.shape[0], labels.max() + 1)
+    hi = np.full(A.shape[0], -2)
+    np.minimum.at(lo, rows, labels[A.indices])
+    np.maximum.at(hi, rows, labels[A.indices])
+    lo[nnz == 0] = -2
+    return lo, hi
+
+
+# rows of lb <= A x <= ub as G x <= h
+def _le_form(A, lb_row, ub_row):
+    up = np.isfinite(ub_row)
+    dn = np.isfinite(lb_row)
+    G = sp.vstack([A[up], -A[dn]]).tocsr()
+    return G, np.concatenate((ub_row[up], -lb_row[dn]))
+
+
+# build and solve one block in a worker process
+# return (status ok, x, objective value, reduced costs of the columns rc)
+def _solve_block(args):
+    solver, c, A, lb_row, ub_row, lb_col, ub_col, integ, rc = args
+    md = Model(solver=solver, names=False)
+    x = md.load(c, A, lb_row, ub_row, lb_col, ub_col, integrality=integ)
+    md._md_solve()
+    if md.status() not in md.statusmap['optimal']:
+        return False, None, None, None
+    xv = md.var_val(x)
+    if rc is not None:
+        rc = np.array(md._var_rc(x[rc].tolist()))
+    return True, xv, md.obj_val(), rc
+
+
+# lagrangian relaxation of the rows linking the column blocks,
+# return the best lower bound (upper bound for max) and the last x
+def _lagrangian(solver, data, labels, pool, iters, tol, step):
+    c, A, lb_row, ub_row, lb_col, ub_col, integ, sense = data
+    sign = 1 if sense == 'min' else -1
+    lo, hi = _row_span(A, labels)
+    own = (lo == hi) & (lo != -2)
+    link = (lo != hi) & (lo != -2)
+    G, h = _le_form(A[link], lb_row[link], ub_row[link])
+    blocks = [(np.nonzero(labels == b)[0], np.nonzero(own & (lo == b))[0]) for b in np.unique(labels)]
+    lam = np.zeros(G.shape[0])
+    best = -np.inf
+    x = np.zeros(A.shape[1])
+    for k in range(iters):
+        cost = sign * c + G.T @ lam
+        tasks = [(solver, cost[cols], A[rows][:, cols], lb_row[rows], ub_row[rows],
+                  lb_col[cols], ub_col[cols], integ[cols], None) for cols, rows in blocks]
+        val = -lam @ h
+        for (cols, rows), (ok, xb, ob, _) in zip(blocks, pool.map(_solve_block, tasks)):
+            if not ok:
+                raise ValueError('Lagrangian subproblem is not solved to optimality.')
+            x[cols] = xb
+            val += ob
+        best = max(best, val)
+        g = G @ x - h
+        if np.all(g <= tol) and abs(lam @ g) <= tol * (1 + abs(best)):
+            break
+        lam = np.maximum(lam + step / (k + 1) * g / max(np.linalg.norm(g), tol), 0)
+    return sign * best, x
+
+
+# multi-cut benders decomposition on the linking (label -1) columns
+# the subproblems must be LPs with relatively complete recourse
+def _benders(solver, data, labels, pool, iters, tol, theta_lb=-1e9):
+    c, A, lb_row, ub_row, lb_col, ub_col, integ, sense = data
+    sign = 1 if sense == 'min' else -1
+    lo, hi = _row_span(A, labels)
+    if np.any((lo >= 0) & (lo != hi)):
+        raise ValueError('Benders does not support rows linking two blocks.')
+    first = np.nonzero(labels == -1)[0]
+    if len(first) == 0:
+        raise ValueError('Benders needs first-stage (untagged) variables.')
+    blocks = []
+    for b in np.unique(labels[labels >= 0]):
+        rows = np.nonzero(hi == b)[0]
+        cols = np.nonzero(labels == b)[0]
+        if np.any(integ[cols] != 0):
+            raise ValueError('Benders subproblems should be continuous.')
+        link = np.intersect1d(first, A[rows].indices)
+        blocks.append((rows, np.concatenate((link, cols)), len(link)))
+    # master: first-stage columns and one theta per block
+    master = Model(solver=solver, names=False)
+    mrows = np.nonzero(hi == -1)[0]
+    x0 = master.load(sign * c[first], A[mrows][:, first], lb_row[mrows], ub_row[mrows],
+                     lb_col[first], ub_col[first], integrality=integ[first])
+    theta = master.var(len(blocks), lb=theta_lb, name='theta')
+    master.obj((sign * c[first] * x0).sum() + theta.sum(), 'min')
+    x = np.zeros(A.shape[1])
+    best, xbest = np.inf, x.copy()
+    for k in range(iters):
+        master._md_solve()
+        if master.status() not in master.statusmap['optimal']:
+            raise ValueError('Benders master problem is not solved to optimality.')
+        x[first] = master.var_val(x0)
+        thv = master.var_val(theta)
+        lower = master.obj_val()
+        upper = sign * c[first] @ x[first]
+        tasks = []
+        for rows, cols, nl in blocks:
+            lbc, ubc = lb_col[cols].copy(), ub_col[cols].copy()
+            lbc[:nl] = ubc[:nl] = x[cols[:nl]]
+            cost = sign * c[cols]
+            cost[:nl] = 0
+            tasks.append((solver, cost, A[rows][:, cols], lb_row[rows], ub_row[rows],
+                          lbc, ubc, integ[cols], np.arange(nl)))
+        cuts = []
+        for b, ((rows, cols, nl), (ok, xb, ob, rc)) in enumerate(zip(blocks, pool.map(_solve_block, tasks))):
+            if not ok:
+                raise ValueError('Benders subproblem is not solved to optimality.')
+            x[cols[nl:]] = xb[nl:]
+            upper += ob
+            if thv[b] < ob - tol * (1 + abs(ob)):
+                cuts.append((b, cols[:nl], ob, rc))
+        if upper < best:
+            best, xbest = upper, x.copy()
+        if best - lower <= tol * (1 + abs(best)) or len(cuts) == 0:
+            break
+        for b, link, ob, rc in cuts:
+            pos = np.searchsorted(first, link)
+            master.con(theta[b] - (rc * x0[pos]).sum(), '>=', ob - rc @ x[link])
+    return sign * best, xbest
+
+
+#### Parameter autotuning
+# tune solver-neutral parameters (keys of paramsmap) by successive halving
+# build_fn(md, instance) builds one instance on md; build_fn and the
+#   instances are sent to worker processes, so they should be picklable
+# space: {param: [candidate values]}, budget: maximum number of solves
+# the best settings are written to profile as {solver: params}
+# return the best params and the history of runs
+def tune(build_fn, instances, space={}, budget=20, solver='gurobi', configs=8, workers=None, profile=None, seed=0):
+    paramsmap = Model(solver=solver).paramsmap
+    space = {key: vals for key, vals in space.items() if paramsmap[key][0] is not None}
+    rng = np.random.RandomState(seed)
+    cands = [{}]
+    for _ in range(configs * 4):
+        if len(cands) >= configs:
+            break
+        cand = {key: vals[rng.randint(len(vals))] for key, vals in space.items()}
+        if cand not in cands:
+            cands.append(cand)
+    history = []
+    scores = {}
+    n = 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while len(history) < budget:
+            n = min(n, len(instances))
+            tasks = [(build_fn, instances[i], solver, cand) for cand in cands for i in range(n)]
+            tasks = tasks[:budget - len(history)]
+            runs = list(pool.map(_tune_run, tasks))
+            for task, run in zip(tasks, runs):
+                run['params'] = task[3]
+                history.append(run)
+            runs_by = {}
+            for run in runs:
+                runs_by.setdefault(json.dumps(run['params'], sort_keys=True), []).append(run['solve'])
+            scores = {key: np.mean(times) for key, times in runs_by.items()}
+            # keep the faster half on twice as many instances
+            ranked = sorted(scores, key=scores.get)
+            if len(ranked) <= 2:
+                break
+            cands = [json.loads(key) for key in ranked[:len(ranked) // 2]]
+            n *= 2
+    best = json.loads(min(scores, key=scores.get)) if len(scores) > 0 else {}
+    if profile is not None:
+        prof = {}
+        if os.path.exists(profile):
+            with open(profile) as f:
+                prof = json.load(f)
+        prof[solver] = best
+        with open(profile, 'w') as f:
+            json.dump(prof, f, indent=2)
+    return best, history
+
+
+# build and solve one instance under params, return the phase times
+# a failed solve gets an infinite solve time
+def _tune_run(args):
+    build_fn, instance, solver, params = args
+    t0 = time.perf_counter()
+    md = Model(solver=solver)
+    build_fn(md, instance)
+    t1 = time.perf_counter()
+    md.setParams(params)
+    md._md_solve()
+    t2 = time.perf_counter()
+    ok = md.status() in md.statusmap['optimal'] or md.status() in md.statusmap['feasible']
+    return {'build': t1 - t0, 'solve': t2 - t1 if ok else np.inf, 'status': md.status()}
+
+
+#### Rolling horizon driver
+# solve a model with a trailing time axis on overlapping windows
+# build(md, ts, win) adds the periods ts to md and returns (vars, obj), where
+#   vars: {name: var array whose last axis has len(ts)}
+#   obj: objective expression of the periods ts
+#   win: {name: var array of the periods currently in the window}
+# names of vars/cons created in build should be unique per call (or left empty)
+class RollingHorizon:
+    def __init__(self, build, horizon, window, step=1, keep=1, solver='gurobi', sense='min', **args):
+        if not 1 <= step <= window:
+            raise ValueError('Input "step" should be between 1 and "window".')
+        if keep < 0:
+            raise ValueError('Input "keep" should be nonnegative.')
+        self.build = build
+        self.horizon = horizon
+        self.window = window
+        self.step = step
+        # number of committed periods kept in the window for linking constraints
+        self.keep = keep
+        self.sense = sense
+        self.md = Model(solver=solver, **args)
+        self.win = {}
+        self.periods = []
+        self.batches = []
+        self.sols = {}
+
+    # solve all windows, return the window objectives and the stitched solution arrays
+    def solve(self, params={}):
+        T = self.horizon
+        objs = []
+        self._add(list(range(min(self.window, T))))
+        t = 0
+        while t < T:
+            self.md.obj(sum(batch[2] for batch in self.batches), self.sense)
+            objs.append(self.md.solve(params=params))
+            vals = {key: self.md.var_val(var) for key, var in self.win.items()}
+            # commit the first step periods, or all of them in the last window
+            if t + self.window >= T:
+                n = T - t
+            else:
+                n = min(self.step, T - t)
+            pos = self.periods.index(t)
+            # solution of the var blocks that expire after this window
+            last = {key: self.md.var_val(self.md.vars[key]) for batch in self.batches
+                    if batch[0][-1] < t + n - self.keep for key in batch[3]}
+            for key, var in self.win.items():
+                self.sols[key][..., t:t + n] = vals[key][..., pos:pos + n]
+                self.md.fix(var[..., pos:pos + n], vals[key][..., pos:pos + n])
+                self.md.warm_start(var[..., pos + n:], vals[key][..., pos + n:])
+            t += n
+            self._expire(t - self.keep, last)
+            t1 = self.periods[-1] + 1 if len(self.periods) > 0 else t
+            new = list(range(t1, min(t + self.window, T)))
+            if len(new) > 0:
+                self._add(new)
+                # shift the last solved period into the new periods
+                for key, var in self.win.items():
+                    self.md.warm_start(var[..., -len(new):], vals[key][..., -1:])
+        return objs, self.sols
+
+    # add periods ts to the window
+    def _add(self, ts):
+        cons, allvars = set(self.md.cons), set(self.md.vars)
+        mvars, obj = self.build(self.md, ts, self.win)
+        self.batches.append((ts, [key for key in self.md.cons if key not in cons], obj,
+                             [key for key in self.md.vars if key not in allvars]))
+        for key, var in mvars.items():
+            if key in self.win:
+                self.win[key] = np.concatenate((self.win[key], var), axis=-1)
+            else:
+                self.win[key] = var
+                self.sols[key] = np.full(var.shape[:-1] + (self.horizon,), np.nan)
+        self.periods += list(ts)
+
+    # drop periods before t0 from the window; batches of expired periods
+    # have their constraints removed, and all their variables (also helpers
+    # not returned by build) fixed to the last solution, substituted into the
+    # remaining rows and removed (kept as empty columns with cplex)
+    def _expire(self, t0, last):
+        batches = []
+        for batch in self.batches:
+            if batch[0][-1] < t0:
+                for key in batch[1]:
+                    self.md.remove(key)
+                for key in batch[3]:
+                    self.md.fix(self.md.vars[key], last[key])
+                    self.md.remove_fixed(key)
+            else:
+                batches.append(batch)
+        self.batches = batches
+        n = sum(1 for t in self.periods if t < t0)
+        if n > 0:
+            self.periods = self.periods[n:]
+            for key in self.win:
+                self.win[key] = self.win[key][..., n:]
@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+from tensoropt import Model
+
+
+# a delta cancelling a coefficient to 0 has to reach the solver
+@pytest.mark.parametrize('solver', ['gurobi', 'cplex'])
+def test_update_coeffs_to_zero(solver):
+    md = Model(solver=solver)
+    X = md.var(3, lb=0, ub=5, name='X')
+    Y = md.var(3, lb=0, ub=2, name='Y')
+    md.con(X, '<=', Y, name='c')
+    md.obj(-X.sum(), 'min')
+    assert md.solve() == pytest.approx(-6)
+    md.update_coeffs('c', ([0], [0], [-1.0]))
+    assert md.solve() == pytest.approx(-9)